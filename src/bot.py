@@ -1,17 +1,25 @@
 import asyncio
-import json
+import bisect
+import functools
+import itertools
+import math
 import os
 import sys
 import time
+import traceback
 import uuid
 import urllib.parse
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
+from types import MappingProxyType
 
-import requests
+import aiohttp
+import orjson
 import websockets
-from websockets.exceptions import ConnectionClosed, InvalidStatusCode
+from websockets.exceptions import ConnectionClosed
 from dotenv import load_dotenv
 
 import asyncio
@@ -20,6 +28,12 @@ from playsound import playsound
 # For secure random drawing of giveaway winners
 import secrets
 
+# uvloop is an optional, faster event loop (not available on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 load_dotenv()
 
 # Use a SystemRandom instance for unpredictable draws
@@ -41,11 +55,26 @@ STREAMER_USERNAME = os.getenv("STREAMER_USERNAME")
 # We'll fetch these dynamically on startup rather than storing them in .env:
 CHANNEL_TYPE = os.getenv("CHANNEL_TYPE", "messaging")
 CHANNEL_ID = None  # We'll set this after fetching from the portal
+TARGET_CID = None  # f"{CHANNEL_TYPE}:{CHANNEL_ID}", kept in sync by set_channel_id()
 STREAMER_WALLET_ADDRESS = None  # We'll set this after fetching from the portal
 
+# Shared HTTP session (keep-alive connection pool), created once the event loop is running
+http_session = None
+
 # Example rate-limit config (seconds between bot messages):
 BOT_MESSAGE_RATE_LIMIT = float(os.getenv("BOT_MESSAGE_RATE_LIMIT", "0.01"))
 
+# Most bot messages allowed to wait in the send queue; newer ones are dropped past this
+MAX_PENDING_BOT_MESSAGES = int(os.getenv("MAX_PENDING_BOT_MESSAGES", "256"))
+# Queued messages taken per send round (posted in order, paced by one sleep)
+MAX_BOT_MESSAGE_BATCH = 5
+# Seconds allowed for queued messages / data to be written out after a crash
+SHUTDOWN_DRAIN_SECONDS = 10.0
+# Identical bot messages queued within this many seconds are sent only once
+BOT_MESSAGE_DEDUPE_SECONDS = 2.0
+# How many of the bot's own message IDs are remembered (only recent echoes matter)
+MAX_TRACKED_IDS = 1000
+
 # Promotions configuration
 PROMOTIONS_ENABLED = bool(int(os.getenv("PROMOTIONS_ENABLED", "0")))
 PROMOTION_INTERVAL_SECONDS = int(os.getenv("PROMOTION_INTERVAL_SECONDS", "1"))
@@ -53,6 +82,7 @@ promotions_list = []
 
 # configurable warning times (in minutes) for giveaways
 GIVEAWAY_WARNING_TIMES_MINUTES = [10, 5, 4, 3, 2, 1]
+GIVEAWAY_WARNING_TIMES_SECONDS = tuple(sorted((m * 60 for m in GIVEAWAY_WARNING_TIMES_MINUTES), reverse=True))
 FINAL_COUNTDOWN_SECONDS = int(os.getenv("FINAL_COUNTDOWN_SECONDS", "10"))
 
 # Donation thresholds and corresponding sounds
@@ -62,6 +92,8 @@ DONATION_SOUNDS = [
     # (500, "../sounds/nice.mp3"),
     # (1000, "../sounds/amazing.mp3"),
 ]
+# Highest threshold first, so the first match is the biggest sound earned
+SORTED_DONATION_SOUNDS = sorted(DONATION_SOUNDS, key=lambda x: x[0], reverse=True)
 
 # reserved commands that cannot be used as giveaway entry commands
 RESERVED_COMMANDS = {
@@ -106,12 +138,26 @@ DONATIONS_JSON_PATH = PROJECT_ROOT / "donations.json"
 GIVEAWAYS_JSON_PATH = PROJECT_ROOT / "giveaways.json"
 GIVEAWAYS_LOG_PATH = PROJECT_ROOT / "giveaways_log.txt"
 
+_ts_cache = [0.0, ""]  # [time.time() when formatted, ISO string]
+
+def utcnow_iso() -> str:
+    """
+    Current UTC time as an ISO string, re-formatted at most every half second.
+    Only meant for log timestamps, where that granularity is plenty.
+    """
+    now = time.time()
+    # abs(): a wall clock stepped backwards (NTP) must refresh too, not freeze
+    if abs(now - _ts_cache[0]) > 0.5:
+        _ts_cache[0] = now
+        _ts_cache[1] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    return _ts_cache[1]
+
 def get_messages_log_path() -> Path:
-    date_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    date_str = utcnow_iso()[:10]  # YYYY-MM-DD
     return LOGS_FOLDER / f"{date_str}_messages.log"
 
 def get_raw_log_path() -> Path:
-    date_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    date_str = utcnow_iso()[:10]  # YYYY-MM-DD
     return LOGS_FOLDER / f"{date_str}_raw_message.log"
 
 # --------------------------------------------------
@@ -121,18 +167,38 @@ def get_raw_log_path() -> Path:
 admins_set = set()       # for quick membership
 blacklist_set = set()    # for ignoring messages entirely
 users_db = {}            # { "0xABC": {"wallet":..., "name":..., "xp":..., "level":...}, ... }
+xp_index = []            # sorted [(-xp, wallet), ...] so !rank is a bisect, not a full sort
 donations_db = {}        # { "0xABC": 123, ... }
 giveaways_db = {}        # { "!foam": { "uuid":..., "name":..., "entry_name":..., ... }, ... }
+                         # keys starting with "_" are in-memory only and never saved
 
-message_send_queue = asyncio.Queue()  # for sending chat messages
-user_last_msg_ts = {}                 # { wallet: timestamp_of_last_message }
+message_send_queue = asyncio.Queue(maxsize=MAX_PENDING_BOT_MESSAGES)  # for sending chat messages
+user_last_msg_ts = {}                 # { wallet: time.monotonic() of last message }
 quit_event = asyncio.Event()          # signal a requested shutdown
 bot_sent_message_ids = set()          # track messages sent by the bot (no XP for these)
+bot_sent_message_order = deque()      # same IDs, oldest first, to bound the set above
+_recent_bot_msgs = {}                 # { message text: time.monotonic() when last queued }
+
+giveaway_timers = {}                  # { entry_name: [TimerHandle, ...] }
+countdowns = {}                       # { entry_name: [loop.time() deadline, last announced second] }
+countdown_started = asyncio.Event()   # wakes countdown_ticker() when it has nothing to tick
+
+# Dirty flags for the data files. The mark_*_dirty helpers only set these;
+# persistence_flusher() writes the files to disk in the background.
+PERSIST_INTERVAL_SECONDS = 1.0
+dirty_admins = False
+dirty_blacklist = False
+dirty_users = False
+dirty_donations = False
+dirty_giveaways = False
+persist_lock = asyncio.Lock()  # only one flush writes files at a time
 
 # --------------------------------------------------
 # Filename Validation for Prize Lists
 # --------------------------------------------------
 
+_PRIZELIST_INVALID_RE = re.compile(r'[<>:"/\\|?*\x00-\x1F]')
+
 def is_valid_prizelist_name(name: str) -> bool:
     """
     Returns True if 'name' is acceptable as a Windows-safe filename
@@ -140,8 +206,7 @@ def is_valid_prizelist_name(name: str) -> bool:
     if not name or len(name) > 15:
         return False
 
-    invalid_pattern = r'[<>:"/\\|?*\x00-\x1F]'
-    if re.search(invalid_pattern, name):
+    if _PRIZELIST_INVALID_RE.search(name):
         return False
 
     if '..' in name:
@@ -156,17 +221,19 @@ def is_valid_prizelist_name(name: str) -> bool:
 # SOUND QUEUE
 # ------------------------------------------
 sound_queue = asyncio.Queue()
+audio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
 
 async def audio_player_loop():
     """
     Continuously waits for a sound file path from 'sound_queue',
-    then plays it in a blocking manner before reading the next one.
+    then plays it on the audio thread before reading the next one.
     """
+    loop = asyncio.get_running_loop()
     while True:
         sound_path = await sound_queue.get()
         try:
-            # playsound blocks until the sound finishes
-            playsound(sound_path)
+            # playsound blocks until the sound finishes, so keep it off the event loop
+            await loop.run_in_executor(audio_executor, playsound, sound_path)
         except Exception as e:
             print(f"[ERROR] Could not play sound {sound_path}: {e}")
         finally:
@@ -183,12 +250,11 @@ def load_admins():
         for line in lines:
             line = line.strip()
             if line:
-                admins_set.add(line.lower())
+                admins_set.add(sys.intern(line.lower()))
 
-def save_admins():
-    with ADMINS_TXT_PATH.open("w", encoding="utf-8") as f:
-        for admin in sorted(admins_set):
-            f.write(admin + "\n")
+def mark_admins_dirty():
+    global dirty_admins
+    dirty_admins = True
 
 def load_blacklist():
     blacklist_set.clear()
@@ -197,72 +263,218 @@ def load_blacklist():
         for line in lines:
             line = line.strip()
             if line:
-                blacklist_set.add(line.lower())
+                blacklist_set.add(sys.intern(line.lower()))
+
+def mark_blacklist_dirty():
+    global dirty_blacklist
+    dirty_blacklist = True
 
-def save_blacklist():
-    with BLACKLIST_TXT_PATH.open("w", encoding="utf-8") as f:
-        for entry in sorted(blacklist_set):
-            f.write(entry + "\n")
+def _lines_file_bytes(entries) -> bytes:
+    return "".join(entry + "\n" for entry in sorted(entries)).encode("utf-8")
 
 def load_users():
     global users_db
     if USERS_JSON_PATH.is_file():
         try:
-            users_db = json.loads(USERS_JSON_PATH.read_text(encoding="utf-8"))
+            users_db = orjson.loads(USERS_JSON_PATH.read_bytes())
         except:
             print("[ERROR] Malformed users.json, ignoring.")
             users_db = {}
     else:
         users_db = {}
+    # Wallets are canonical lowercase and interned, so the per-message
+    # lookups in record_messages compare by identity.
+    users_db = {sys.intern(wkey.lower()): u for wkey, u in users_db.items()}
+    for wkey, u in users_db.items():
+        u["wallet"] = wkey
+    xp_index[:] = sorted((-u["xp"], wkey) for wkey, u in users_db.items())
 
-def save_users():
-    USERS_JSON_PATH.write_text(json.dumps(users_db, indent=2), encoding="utf-8")
+def mark_users_dirty():
+    global dirty_users
+    dirty_users = True
 
 def load_donations():
     global donations_db
     if DONATIONS_JSON_PATH.is_file():
         try:
-            donations_db = json.loads(DONATIONS_JSON_PATH.read_text(encoding="utf-8"))
+            donations_db = orjson.loads(DONATIONS_JSON_PATH.read_bytes())
         except:
             print("[ERROR] Malformed donations.json, ignoring.")
             donations_db = {}
     else:
         donations_db = {}
+    donations_db = {sys.intern(wkey.lower()): amount for wkey, amount in donations_db.items()}
 
-def save_donations():
-    DONATIONS_JSON_PATH.write_text(json.dumps(donations_db, indent=2), encoding="utf-8")
+def mark_donations_dirty():
+    global dirty_donations
+    dirty_donations = True
 
 def load_giveaways():
     global giveaways_db
     if GIVEAWAYS_JSON_PATH.is_file():
         try:
-            giveaways_db = json.loads(GIVEAWAYS_JSON_PATH.read_text(encoding="utf-8"))
+            giveaways_db = orjson.loads(GIVEAWAYS_JSON_PATH.read_bytes())
         except:
             print("[ERROR] Malformed giveaways.json, ignoring.")
             giveaways_db = {}
     else:
         giveaways_db = {}
+    for entry_name, g in giveaways_db.items():
+        g["_entries_set"] = {e["wallet"] for e in g["entries"]}
+        g["warned_for"] = set(g.get("warned_for", ()))
+
+def mark_giveaways_dirty():
+    global dirty_giveaways
+    dirty_giveaways = True
+
+def giveaways_snapshot() -> dict:
+    """
+    Returns a copy of giveaways_db without the in-memory "_" fields,
+    with the warned_for set written out as a sorted list.
+    """
+    snapshot = {}
+    for entry_name, g in giveaways_db.items():
+        g_copy = {k: v for k, v in g.items() if not k.startswith("_")}
+        g_copy["warned_for"] = sorted(g["warned_for"])
+        snapshot[entry_name] = g_copy
+    return snapshot
+
+def _atomic_write(path: Path, data: bytes):
+    """
+    Writes 'data' to a temp file next to 'path' and swaps it into place,
+    so a crash mid-write never leaves a truncated file behind.
+    """
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _atomic_write_many(items: list) -> list:
+    """
+    Runs _atomic_write for every (path, data) pair in one go, so a flush
+    costs a single executor round-trip. Returns the (path, error) pairs
+    that failed.
+    """
+    failed = []
+    for path, data in items:
+        try:
+            _atomic_write(path, data)
+        except Exception as e:
+            failed.append((path, e))
+    return failed
+
+def _serialize_pending(pending: list, path: Path, serialize, mark_dirty):
+    """Appends (path, bytes, mark_dirty) to pending, or keeps the store dirty if it can't be serialized."""
+    try:
+        pending.append((path, serialize(), mark_dirty))
+    except Exception as e:
+        print(f"[ERROR] Could not serialize {path.name}: {e}")
+        mark_dirty()  # try again on the next flush
+
+async def flush_dirty_data():
+    """
+    Serializes every data file marked dirty and writes it to disk off the event loop.
+    """
+    global dirty_admins, dirty_blacklist, dirty_users, dirty_donations, dirty_giveaways
+    async with persist_lock:
+        # Serialize on the loop so the snapshot can't change underneath us,
+        # then hand the blocking disk writes to the default executor.
+        pending = []
+        if dirty_admins:
+            dirty_admins = False
+            _serialize_pending(pending, ADMINS_TXT_PATH, lambda: _lines_file_bytes(admins_set), mark_admins_dirty)
+        if dirty_blacklist:
+            dirty_blacklist = False
+            _serialize_pending(pending, BLACKLIST_TXT_PATH, lambda: _lines_file_bytes(blacklist_set), mark_blacklist_dirty)
+        if dirty_users:
+            dirty_users = False
+            _serialize_pending(pending, USERS_JSON_PATH, lambda: orjson.dumps(users_db, option=orjson.OPT_INDENT_2), mark_users_dirty)
+        if dirty_donations:
+            dirty_donations = False
+            _serialize_pending(pending, DONATIONS_JSON_PATH, lambda: orjson.dumps(donations_db, option=orjson.OPT_INDENT_2), mark_donations_dirty)
+        if dirty_giveaways:
+            dirty_giveaways = False
+            _serialize_pending(pending, GIVEAWAYS_JSON_PATH, lambda: orjson.dumps(giveaways_snapshot(), option=orjson.OPT_INDENT_2), mark_giveaways_dirty)
+
+        if not pending:
+            return
+
+        loop = asyncio.get_running_loop()
+        failed = await loop.run_in_executor(
+            None, _atomic_write_many, [(path, data) for path, data, _ in pending]
+        )
+        mark_dirty = {path: mark for path, _, mark in pending}
+        for path, e in failed:
+            print(f"[ERROR] Could not save {path.name}: {e}")
+            mark_dirty[path]()  # try again on the next flush
+
+async def persistence_flusher():
+    """
+    Coalesces all mark_*_dirty calls into at most one write per store every
+    PERSIST_INTERVAL_SECONDS.
+    """
+    while True:
+        await asyncio.sleep(PERSIST_INTERVAL_SECONDS)
+        await flush_dirty_data()
 
-def save_giveaways():
-    GIVEAWAYS_JSON_PATH.write_text(json.dumps(giveaways_db, indent=2), encoding="utf-8")
+# Log lines are queued as (kind, path, line) and appended by log_writer_loop(),
+# which keeps one open handle per kind instead of reopening files per event.
+log_queue = asyncio.Queue()
 
 def log_raw(direction: str, message: str):
-    timestamp = datetime.now(timezone.utc).isoformat()
+    timestamp = utcnow_iso()
     line = f"{timestamp} [{direction}] {message}\n"
-    raw_path = get_raw_log_path()
-    with raw_path.open("a", encoding="utf-8") as rf:
-        rf.write(line)
+    log_queue.put_nowait(("raw", get_raw_log_path(), line))
 
 def log_message_event(event_data):
-    msg_path = get_messages_log_path()
-    with msg_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event_data, ensure_ascii=False) + "\n")
+    line = orjson.dumps(event_data).decode("utf-8") + "\n"
+    log_queue.put_nowait(("messages", get_messages_log_path(), line))
 
 def log_giveaway_activity(activity: str):
-    ts = datetime.now(timezone.utc).isoformat()
+    ts = utcnow_iso()
     line = f"{ts} {activity}\n"
-    with GIVEAWAYS_LOG_PATH.open("a", encoding="utf-8") as gf:
-        gf.write(line)
+    log_queue.put_nowait(("giveaways", GIVEAWAYS_LOG_PATH, line))
+
+def _write_log_line(handles: dict, kind: str, path: Path, line: str):
+    current = handles.get(kind)
+    if current is None or current[0] != path:
+        # first line for this kind, or the daily log rolled over to a new file
+        if current is not None:
+            current[1].close()
+        current = (path, path.open("a", encoding="utf-8"))
+        handles[kind] = current
+    current[1].write(line)
+
+def _write_log_batch(handles: dict, batch: list):
+    for kind, path, line in batch:
+        _write_log_line(handles, kind, path, line)
+    for _, f in handles.values():
+        f.flush()
+
+async def log_writer_loop():
+    """
+    Appends queued log lines from the default executor, writing everything
+    that is ready before flushing each file once.
+    """
+    loop = asyncio.get_running_loop()
+    handles = {}  # { kind: (path, open_file) }, only touched by one batch at a time
+    try:
+        while True:
+            batch = [await log_queue.get()]
+            while not log_queue.empty():
+                batch.append(log_queue.get_nowait())
+            try:
+                await loop.run_in_executor(None, _write_log_batch, handles, batch)
+            except Exception as e:
+                print(f"[ERROR] Could not write logs: {e}")
+            finally:
+                for _ in batch:
+                    log_queue.task_done()
+    finally:
+        for _, f in handles.values():
+            f.close()
 
 # --------------------------------------------------
 # Promotions Loading
@@ -297,7 +509,7 @@ def load_promotions():
 # --------------------------------------------------
 # Fetch Channel & Streamer Info from Portal
 # --------------------------------------------------
-def fetch_channel_info():
+async def fetch_channel_info():
     """
     Fetches the current 'chatChannelId' and 'streamer.walletAddress'
     from https://backend.portal.abs.xyz/api/streamer/<STREAMER_USERNAME>.
@@ -305,40 +517,47 @@ def fetch_channel_info():
     """
     url = f"https://backend.portal.abs.xyz/api/streamer/{STREAMER_USERNAME}"
     print(f"[DEBUG] Fetching channel info from: {url}")
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
+    async with http_session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
 
     channel_id = data["chatChannelId"]
     streamer_wallet = data["streamer"]["walletAddress"]
     print(f"[DEBUG] Fetched chatChannelId={channel_id}, streamerWallet={streamer_wallet}")
     return channel_id, streamer_wallet
 
+def set_channel_id(channel_id: str):
+    global CHANNEL_ID, TARGET_CID
+    CHANNEL_ID = channel_id
+    TARGET_CID = f"{CHANNEL_TYPE}:{channel_id}"
+
 # --------------------------------------------------
 # Initialization
 # --------------------------------------------------
 
 def init_data():
+    """Loads every data file from disk. Touches no asyncio objects, so it may run in a worker thread."""
     load_admins()
     load_blacklist()
     load_users()
     load_donations()
     load_giveaways()
     load_promotions()
-    queue_bot_message("The Oekaki.io XP / Prize bot is starting up!")
 
 # --------------------------------------------------
 # Utility
 # --------------------------------------------------
 
-def is_admin(user_str: str) -> bool:
-    return user_str.lower() in admins_set
+# The helpers below expect an already-lowercased wallet / @name,
+# so the message loop only has to lowercase each sender once.
 
-def is_blacklisted(user_str: str) -> bool:
-    return user_str.lower() in blacklist_set
+def is_admin(user_lower: str) -> bool:
+    return user_lower in admins_set
 
-def try_get_or_init_user(wallet: str, name: str="") -> dict:
-    wkey = wallet.lower()
+def is_blacklisted(user_lower: str) -> bool:
+    return user_lower in blacklist_set
+
+def try_get_or_init_user(wkey: str, name: str="") -> dict:
     if wkey not in users_db:
         users_db[wkey] = {
             "wallet": wkey,
@@ -346,27 +565,42 @@ def try_get_or_init_user(wallet: str, name: str="") -> dict:
             "xp": 0,
             "level": 1,  # start new users at level 1
         }
+        bisect.insort(xp_index, (0, wkey))
     else:
         if name and name != users_db[wkey].get("name"):
             users_db[wkey]["name"] = name
     return users_db[wkey]
 
+@functools.lru_cache(maxsize=256)
 def xp_for_next_level(lvl: int) -> int:
-    return 5 * (lvl**2) + (50 * lvl) + 100
+    return 5 * lvl * lvl + (50 * lvl) + 100
+
+# _cum_xp[lvl] == total XP needed to reach 'lvl'; grown lazily as users level up
+_cum_xp = [0, 0]
+
+def _ensure_cum_xp(lvl: int):
+    while len(_cum_xp) <= lvl:
+        _cum_xp.append(_cum_xp[-1] + xp_for_next_level(len(_cum_xp) - 1))
 
 def total_xp_to_reach_level(lvl: int) -> int:
-    total = 0
-    for l in range(1, lvl):
-        total += xp_for_next_level(l)
-    return total
+    if lvl < 1:
+        return 0
+    _ensure_cum_xp(lvl)
+    return _cum_xp[lvl]
+
+def _reindex_user_xp(wallet: str, old_xp: int, new_xp: int):
+    i = bisect.bisect_left(xp_index, (-old_xp, wallet))
+    if i < len(xp_index) and xp_index[i] == (-old_xp, wallet):
+        del xp_index[i]
+    bisect.insort(xp_index, (-new_xp, wallet))
 
 def ensure_user_xp_and_level(user_obj: dict, xp_gained: int):
     old_xp = user_obj["xp"]
     new_xp = old_xp + xp_gained
     user_obj["xp"] = new_xp
+    _reindex_user_xp(user_obj["wallet"], old_xp, new_xp)
     while True:
-        needed = xp_for_next_level(user_obj["level"])
-        if user_obj["xp"] >= (total_xp_to_reach_level(user_obj["level"]) + needed):
+        if user_obj["xp"] >= total_xp_to_reach_level(user_obj["level"] + 1):
             user_obj["level"] += 1
             queue_bot_message(
                 f"Congrats {user_obj['name'] or user_obj['wallet']}! You leveled up to level {user_obj['level']}!"
@@ -378,34 +612,72 @@ def parse_command_args(text: str):
     return text.strip().split()
 
 def queue_bot_message(msg: str):
-    message_send_queue.put_nowait(msg)
+    # Identical messages queued within a short window (e.g. warnings for
+    # giveaways expiring together) are only sent once.
+    now = time.monotonic()
+    last_queued = _recent_bot_msgs.get(msg)
+    if last_queued is not None and now - last_queued < BOT_MESSAGE_DEDUPE_SECONDS:
+        return
+    if len(_recent_bot_msgs) >= 64:
+        for old_msg, ts in list(_recent_bot_msgs.items()):
+            if now - ts >= BOT_MESSAGE_DEDUPE_SECONDS:
+                del _recent_bot_msgs[old_msg]
+    _recent_bot_msgs[msg] = now
+
+    try:
+        message_send_queue.put_nowait(msg)
+    except asyncio.QueueFull:
+        print(f"[WARN] Bot message queue is full, dropping message: {msg}")
 
 def get_user_rank(wallet: str) -> int:
-    sorted_users = sorted(users_db.values(), key=lambda x: x["xp"], reverse=True)
-    for i, u in enumerate(sorted_users):
-        if u["wallet"] == wallet.lower():
-            return i + 1
-    return len(sorted_users)
+    wkey = wallet.lower()
+    user_obj = users_db.get(wkey)
+    if user_obj is None:
+        return len(xp_index)
+    return bisect.bisect_left(xp_index, (-user_obj["xp"], wkey)) + 1
 
 def get_whitelist_file_path(whitelist_name: str) -> Path:
     return WHITELISTS_FOLDER / f"{whitelist_name}.txt"
 
+_whitelist_cache = {}  # { path: (mtime_ns, frozenset_of_lowercased_wallets) }
+
+def load_whitelist(path: Path) -> frozenset:
+    """
+    Returns the lowercased entries of a whitelist file, re-reading it only
+    when the file's modification time changes.
+    """
+    mtime = path.stat().st_mtime_ns
+    cached = _whitelist_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    members = frozenset(ln.strip().lower() for ln in path.read_text().split() if ln.strip())
+    _whitelist_cache[path] = (mtime, members)
+    return members
+
 def get_prizelist_file_path(prizelist_name: str) -> Path:
     return PRIZELISTS_FOLDER / f"{prizelist_name}.txt"
 
-def pick_random_prize(prizelist_name: str) -> str:
+def pick_random_prizes(prizelist_name: str, k: int) -> list:
+    """
+    Draws up to 'k' prizes without replacement from the prize list and
+    removes them from the file in a single read/write. Returns a list of
+    length 'k', padded with None once the list runs out.
+    """
     path = get_prizelist_file_path(prizelist_name)
-    if not path.is_file():
-        return None
+    if k <= 0 or not path.is_file():
+        return [None] * k
     lines = [ln.strip() for ln in path.read_text(encoding="utf-8").split("\n") if ln.strip()]
     if not lines:
-        return None
-    prize = RNG.choice(lines)
-    lines.remove(prize)
+        return [None] * k
+    # sample positions rather than values so duplicate prize lines are handled correctly
+    picked = RNG.sample(range(len(lines)), min(k, len(lines)))
+    picked_set = set(picked)
+    remaining = [ln for i, ln in enumerate(lines) if i not in picked_set]
     with path.open("w", encoding="utf-8") as f:
-        if lines:
-            f.write("\n".join(lines) + "\n")
-    return prize
+        if remaining:
+            f.write("\n".join(remaining) + "\n")
+    prizes = [lines[i] for i in picked]
+    return prizes + [None] * (k - len(prizes))
 
 # --------------------------------------------------
 # Giveaway management
@@ -478,7 +750,8 @@ def create_new_giveaway(admin_user: str, raw_args: str):
         "ended_at": None,
         "winners": [],
         "min_level": min_level_required,
-        "warned_for": [],
+        "warned_for": set(),
+        "_entries_set": set(),
     }
 
     if minutes:
@@ -487,16 +760,16 @@ def create_new_giveaway(admin_user: str, raw_args: str):
             end_ts = time.time() + (mm * 60.0)
             g_obj["auto_end"] = end_ts
             # pre-check for warnings that are greater than total time
-            warn_times_in_seconds = [m * 60 for m in GIVEAWAY_WARNING_TIMES_MINUTES]
             total_time = end_ts - time.time()
-            for w_sec in warn_times_in_seconds:
+            for w_sec in GIVEAWAY_WARNING_TIMES_SECONDS:
                 if total_time < w_sec:
-                    g_obj["warned_for"].append(w_sec)
+                    g_obj["warned_for"].add(w_sec)
         except:
             pass
 
     giveaways_db[entry_name] = g_obj
-    save_giveaways()
+    schedule_giveaway_timers(entry_name)
+    mark_giveaways_dirty()
     queue_bot_message(
         f"New GA '{g_name}' created with entry '{entry_name}'. (Min level: {min_level_required})"
     )
@@ -509,7 +782,7 @@ def user_enter_giveaway(user_wallet: str, user_name: str, entry_name: str):
     if not g["is_active"]:
         return
 
-    wkey = user_wallet.lower()
+    wkey = user_wallet  # already the lowercased users_db key
     user_obj = users_db.get(wkey, {})
     user_level = user_obj.get("level", 1)
     min_lvl = g.get("min_level", 1)
@@ -517,22 +790,21 @@ def user_enter_giveaway(user_wallet: str, user_name: str, entry_name: str):
         return
 
     # check duplicates
-    for e in g["entries"]:
-        if e["wallet"] == wkey:
-            return
+    if wkey in g["_entries_set"]:
+        return
 
     # whitelist check
     wl = g["whitelist_name"]
     if wl:
         wl_path = get_whitelist_file_path(wl)
         if wl_path.is_file():
-            lines = [ln.strip().lower() for ln in wl_path.read_text().split()]
-            if wkey not in lines:
+            if wkey not in load_whitelist(wl_path):
                 queue_bot_message(f"{user_name or user_wallet} not whitelisted for {g['name']}")
                 return
 
     g["entries"].append({"wallet": wkey, "name": user_name, "ts": time.time()})
-    save_giveaways()
+    g["_entries_set"].add(wkey)
+    mark_giveaways_dirty()
     queue_bot_message(f"{user_name or user_wallet} entered GA {g['name']}.")
 
 def end_giveaway(entry_name: str):
@@ -557,12 +829,14 @@ def end_giveaway(entry_name: str):
     g["winners"] = winners
     g["is_active"] = False
     g["ended_at"] = datetime.now(timezone.utc).isoformat()
+    # a new giveaway may reuse this entry command, so drop everything still pending
+    cancel_giveaway_timers(entry_name)
 
     if winners:
         prizelist_name = g.get("prizelist_name", "")
         if prizelist_name:
-            for w in winners:
-                prize = pick_random_prize(prizelist_name)
+            prizes = pick_random_prizes(prizelist_name, len(winners))
+            for w, prize in zip(winners, prizes):
                 if prize:
                     w["prize"] = prize
                     queue_bot_message(
@@ -583,7 +857,7 @@ def end_giveaway(entry_name: str):
         msg = f"'{g['name']}' GA ended! No entries... no winners!"
 
     queue_bot_message(msg)
-    save_giveaways()
+    mark_giveaways_dirty()
     log_giveaway_activity(f"Ended GA entry='{entry_name}', winners={winners}")
 
 def cancel_giveaway(entry_name: str):
@@ -597,8 +871,9 @@ def cancel_giveaway(entry_name: str):
         g["winners"] = []
     queue_bot_message(f"Canceled GA {g['name']}.")
     log_giveaway_activity(f"Canceled {entry_name} - {g['name']}")
+    cancel_giveaway_timers(entry_name)
     del giveaways_db[entry_name]
-    save_giveaways()
+    mark_giveaways_dirty()
 
 def timeleft_giveaway(entry_name: str):
     if entry_name not in giveaways_db:
@@ -624,7 +899,7 @@ def timeleft_giveaway(entry_name: str):
         queue_bot_message(f"GA {g['name']} has no auto-end time.")
         return
 
-    secs_left = g["auto_end"] - time.time()
+    secs_left = g["_deadline"] - asyncio.get_running_loop().time()
     if secs_left <= 0:
         queue_bot_message(f"GA {g['name']} auto-end time passed, but not forcibly ended.")
         return
@@ -688,10 +963,11 @@ def set_giveaway_end_in(entry_name: str, seconds: int):
     new_end_time = time.time() + seconds
     g["auto_end"] = new_end_time
     # Reset warnings / final countdown flags so they can be retriggered
-    g["warned_for"] = []
+    g["warned_for"] = set()
     if "in_final_countdown" in g:
         g["in_final_countdown"] = False
-    save_giveaways()
+    schedule_giveaway_timers(entry_name)
+    mark_giveaways_dirty()
 
     queue_bot_message(f"Updated GA '{g['name']}' to end in {seconds} second(s) from now.")
     log_giveaway_activity(
@@ -702,51 +978,65 @@ def set_giveaway_end_in(entry_name: str, seconds: int):
 # Donation Checking
 # --------------------------------------------------
 
+# e.g. "tipped 500 PENGU"
+_DONATION_RE = re.compile(r"tipped\s+(\d+)\s+pengu", re.IGNORECASE)
+
+# Larger amounts are ignored: running totals must stay within the
+# 64-bit integers orjson can write back to disk.
+MAX_DONATION_AMOUNT = 10**12
+
 def check_if_donation_message(msg_obj: dict) -> int:
     if msg_obj.get("pinned") is True:  # pinned => typically a donation
-        text_lower = msg_obj.get("text", "").lower()
-        if text_lower.startswith("tipped ") and " pengu" in text_lower:
-            splitted = text_lower.split()
-            if len(splitted) >= 3:
-                try:
-                    donated = int(splitted[1])
-                    return max(donated, 0)
-                except:
-                    pass
+        m = _DONATION_RE.match(msg_obj.get("text", ""))
+        if m:
+            digits = m.group(1)
+            # check the length first; int() of a huge digit string is itself an error
+            if len(digits) > len(str(MAX_DONATION_AMOUNT)) or int(digits) > MAX_DONATION_AMOUNT:
+                print(f"[WARN] Ignoring implausible donation amount: {digits[:32]}")
+                return 0
+            return int(digits)
     return 0
 
 # --------------------------------------------------
 # Background tasks
 # --------------------------------------------------
 
+# Shared read-only default for missing nested objects in events
+_EMPTY = MappingProxyType({})
+
 async def record_messages(ws):
     while True:
         raw_data = await ws.recv()
         log_raw("recv", raw_data)
 
+        # Only new messages are acted on; skip parsing the rest
+        # (health checks, typing, presence, ...) entirely.
+        if "message.new" not in raw_data:
+            continue
+
         try:
-            data = json.loads(raw_data)
-        except json.JSONDecodeError:
+            data = orjson.loads(raw_data)
+        except orjson.JSONDecodeError:
             continue
 
         event_type = data.get("type")
         if event_type == "message.new":
-            cid = data.get("cid", "")
-            if cid != f"{CHANNEL_TYPE}:{CHANNEL_ID}":
+            if data.get("cid", "") != TARGET_CID:
                 continue
 
-            msg = data.get("message", {})
-            user = msg.get("user", {})
+            msg = data.get("message", _EMPTY)
+            user = msg.get("user", _EMPTY)
             wallet = user.get("id", "")
+            wallet_lower = sys.intern(wallet.lower())
             username = user.get("name", "") or wallet
             message_id = msg.get("id", "")
 
             # Blacklist check
-            if is_blacklisted(wallet) or is_blacklisted(f"@{username.lower()}"):
+            if is_blacklisted(wallet_lower) or is_blacklisted(f"@{username.lower()}"):
                 continue
 
             event_data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": utcnow_iso(),
                 "message_id": message_id,
                 "wallet": wallet,
                 "name": username,
@@ -758,26 +1048,26 @@ async def record_messages(ws):
             if message_id in bot_sent_message_ids:
                 continue
 
-            user_obj = try_get_or_init_user(wallet, username)
+            user_obj = try_get_or_init_user(wallet_lower, username)
             donated_pengu = check_if_donation_message(msg)
 
-            now_ts = time.time()
-            last_ts = user_last_msg_ts.get(wallet, 0)
+            now_ts = time.monotonic()
+            last_ts = user_last_msg_ts.get(wallet_lower, -math.inf)
             time_since_last = now_ts - last_ts
-            user_last_msg_ts[wallet] = now_ts
+            user_last_msg_ts[wallet_lower] = now_ts
 
             xp_gained = 0
             if donated_pengu > 0:
                 xp_gained = donated_pengu
-                donations_db[wallet.lower()] = donations_db.get(wallet.lower(), 0) + donated_pengu
-                save_donations()
+                donations_db[wallet_lower] = donations_db.get(wallet_lower, 0) + donated_pengu
+                mark_donations_dirty()
 
                 # -------------------------------------------
                 # Only play the HIGHEST donation threshold sound
                 # -------------------------------------------
-                # Sort thresholds in descending order by amount_required
+                # Thresholds are pre-sorted in descending order by amount_required
                 biggest_threshold_sound = None
-                for (amount_required, sound_file) in sorted(DONATION_SOUNDS, key=lambda x: x[0], reverse=True):
+                for (amount_required, sound_file) in SORTED_DONATION_SOUNDS:
                     if donated_pengu >= amount_required:
                         biggest_threshold_sound = sound_file
                         break
@@ -793,14 +1083,15 @@ async def record_messages(ws):
 
             if xp_gained > 0:
                 ensure_user_xp_and_level(user_obj, xp_gained)
-                save_users()
+                mark_users_dirty()
 
             txt = msg.get("text", "").strip()
-            if is_admin(wallet):
-                handle_admin_command(wallet, txt)
-                handle_user_command(user_obj, txt)
-            else:
-                handle_user_command(user_obj, txt)
+            if txt.startswith("!"):
+                # split once; both command tables share the parts
+                parts = parse_command_args(txt)
+                if is_admin(wallet_lower):
+                    handle_admin_command(wallet, txt, parts)
+                handle_user_command(user_obj, txt, parts)
 
         else:
             pass
@@ -811,16 +1102,15 @@ async def wait_for_connection_id(ws):
         raw_data = await ws.recv()
         log_raw("recv", raw_data)
         try:
-            data = json.loads(raw_data)
+            data = orjson.loads(raw_data)
         except:
             continue
 
         if "connection_id" in data:
             return data["connection_id"]
 
-def watch_channel(connection_id):
+async def watch_channel(connection_id):
     """Queries/watches the channel with the current CHANNEL_ID."""
-    global CHANNEL_ID  # so we can refresh if needed
 
     url = f"https://chat.stream-io-api.com/channels/{CHANNEL_TYPE}/{CHANNEL_ID}/query"
     params = {
@@ -835,17 +1125,19 @@ def watch_channel(connection_id):
         "state": True,
     }
     try:
-        r = requests.post(url, params=params, json=payload, timeout=10)
-        r.raise_for_status()
-    except requests.HTTPError as e:
+        async with http_session.post(
+            url, params=params, json=payload, timeout=aiohttp.ClientTimeout(total=10)
+        ) as r:
+            r.raise_for_status()
+    except aiohttp.ClientResponseError as e:
         print("[ERROR] watch_channel =>", e)
         # If it’s a 401, we might want to refresh channel info.
-        if e.response.status_code == 401:
+        if e.status == 401:
             print("[WARN] watch_channel => 401, refreshing channel info.")
             try:
-                new_ch, new_wallet = fetch_channel_info()
+                new_ch, new_wallet = await fetch_channel_info()
                 # Overwrite global
-                CHANNEL_ID = new_ch
+                set_channel_id(new_ch)
                 # Possibly also store the new streamer wallet if needed:
                 # STREAMER_WALLET_ADDRESS = new_wallet
             except Exception as ex:
@@ -857,7 +1149,7 @@ async def send_health_check(ws):
     while True:
         await asyncio.sleep(25)
         payload = [{"type":"health.check"}]
-        msg_str = json.dumps(payload)
+        msg_str = orjson.dumps(payload).decode("utf-8")
         try:
             await ws.send(msg_str)
             log_raw("send", msg_str)
@@ -867,335 +1159,426 @@ async def send_health_check(ws):
             print("[ERROR] Pinger =>", exc)
             break
 
-async def connect_and_watch_once():
-    """Connects once to the Stream Chat WS and begins watching channel events."""
-    global CHANNEL_ID  # needed in the watch logic
-
+def chat_ws_url() -> str:
+    """Builds the Stream Chat websocket URL for the bot's wallet."""
     base = "wss://chat.stream-io-api.com/connect"
     user_details = {
         "user_id": APP_WALLET_ADDRESS.lower(),
         "user_details": {"id": APP_WALLET_ADDRESS.lower()},
         "client_request_id": f"python-record-{APP_WALLET_ADDRESS.lower()}",
     }
-    enc_json = urllib.parse.quote(json.dumps(user_details), safe="")
+    enc_json = urllib.parse.quote(orjson.dumps(user_details), safe="")
     enc_auth = urllib.parse.quote(STREAM_AUTH_KEY or "", safe="")
 
-    ws_url = (
+    return (
         f"{base}?json={enc_json}"
         f"&api_key={STREAM_API_KEY}"
         f"&authorization={enc_auth}"
         f"&stream-auth-type=jwt"
         f"&X-Stream-Client=stream-chat-python-client-0.0.1"
     )
-    print("[DEBUG] Connecting =>", ws_url)
-
-    async with websockets.connect(ws_url, ping_interval=None, ping_timeout=None, close_timeout=5) as ws:
-        pinger_task = asyncio.create_task(send_health_check(ws))
-        conn_id = await wait_for_connection_id(ws)
-        watch_channel(conn_id)
-        await record_messages(ws)
 
 async def connect_and_watch_loop():
-    """Keeps attempting to connect to the chat in a loop, with backoff."""
+    """
+    Keeps the chat websocket connected. Iterating websockets.connect()
+    reconnects after every disconnect; it only backs off when the handshake
+    itself fails, so connections that drop before they became healthy
+    (e.g. a rejected JWT closing the socket) get a capped exponential
+    backoff here as well.
+    """
     backoff = 1
     max_backoff = 60
-    while not quit_event.is_set():
+    healthy_after = 30  # seconds a connection must stay up to reset the backoff
+
+    ws_url = chat_ws_url()
+    print("[DEBUG] Connecting =>", ws_url)
+    loop = asyncio.get_running_loop()
+
+    # No permessage-deflate (saves CPU on every frame) and explicit bounds on
+    # frame size / buffered frames so a flood can't grow memory unchecked.
+    async for ws in websockets.connect(
+        ws_url,
+        ping_interval=None,
+        ping_timeout=None,
+        open_timeout=10,
+        close_timeout=5,
+        max_size=2**20,
+        max_queue=32,
+        compression=None,
+    ):
+        # Stream expects its own health.check messages, so this pinger stays;
+        # it lives exactly as long as the connection it pings.
+        pinger_task = asyncio.create_task(send_health_check(ws))
+        ready_at = None
         try:
-            await connect_and_watch_once()
-        except (ConnectionClosed, OSError, InvalidStatusCode) as e:
-            print(f"[ERROR] Connection error: {e}. Retrying in {backoff} second(s).")
-            await asyncio.sleep(backoff)
-            backoff = min(backoff * 2, max_backoff)
+            conn_id = await wait_for_connection_id(ws)
+            ready_at = loop.time()
+            await watch_channel(conn_id)
+            await record_messages(ws)
+        except ConnectionClosed as e:
+            print(f"[ERROR] Connection closed: {e}.")
         except Exception as e:
-            print(f"[ERROR] Unexpected error: {e}. Retrying in {backoff} second(s).")
-            await asyncio.sleep(backoff)
-            backoff = min(backoff * 2, max_backoff)
-        else:
-            # If connect_and_watch_once() returns cleanly, wait some time then try again
-            await asyncio.sleep(backoff)
-            backoff = min(backoff * 2, max_backoff)
+            print(f"[ERROR] Unexpected error: {e}.")
+        finally:
+            pinger_task.cancel()
 
-async def message_sender_loop():
-    """Consumes messages from the bot's queue and POSTs them to the chat channel."""
-    global CHANNEL_ID, STREAMER_WALLET_ADDRESS
+        if quit_event.is_set():
+            break
+        if ready_at is not None and loop.time() - ready_at >= healthy_after:
+            backoff = 1
+            print("[DEBUG] Reconnecting.")
+            continue
+        print(f"[DEBUG] Reconnecting in {backoff} second(s).")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, max_backoff)
 
-    while True:
-        msg_text = await message_send_queue.get()
-        await asyncio.sleep(BOT_MESSAGE_RATE_LIMIT)
-
-        post_url = f"https://chat.stream-io-api.com/channels/{CHANNEL_TYPE}/{CHANNEL_ID}/message"
-        post_params = {
-            "api_key": STREAM_API_KEY,
-            "authorization": STREAM_AUTH_KEY,
-            "stream-auth-type": "jwt",
-        }
-        payload = {"message": {"text": msg_text}}
+def remember_bot_message_id(message_id: str):
+    """Records one of the bot's own message IDs, forgetting the oldest past MAX_TRACKED_IDS."""
+    if message_id in bot_sent_message_ids:
+        return
+    bot_sent_message_ids.add(message_id)
+    bot_sent_message_order.append(message_id)
+    if len(bot_sent_message_order) > MAX_TRACKED_IDS:
+        bot_sent_message_ids.discard(bot_sent_message_order.popleft())
 
-        try:
-            resp = requests.post(post_url, params=post_params, json=payload, timeout=5)
-            resp.raise_for_status()
+async def send_bot_message(msg_text: str):
+    """POSTs one bot message to the chat channel, retrying once after a 401."""
+    global STREAMER_WALLET_ADDRESS
+
+    post_url = f"https://chat.stream-io-api.com/channels/{CHANNEL_TYPE}/{CHANNEL_ID}/message"
+    post_params = {
+        "api_key": STREAM_API_KEY,
+        "authorization": STREAM_AUTH_KEY,
+        "stream-auth-type": "jwt",
+    }
+    payload = {"message": {"text": msg_text}}
 
-            data = resp.json()
-            msg_obj = data.get("message", {})
-            if "id" in msg_obj:
-                bot_sent_message_ids.add(msg_obj["id"])
-
-            log_raw("send", f"SENT BOT MESSAGE: {msg_text}")
-            print("[DEBUG] BOT SENT =>", msg_text)
-        except requests.HTTPError as e:
-            # If we get a 401, assume the channel might have changed
-            if e.response.status_code == 401:
-                print("[WARN] message_sender_loop => 401 Unauthorized. Refreshing channel ID and retrying once.")
-                try:
-                    new_ch, new_wallet = fetch_channel_info()
-                    CHANNEL_ID = new_ch
-                    STREAMER_WALLET_ADDRESS = new_wallet
-
-                    # Retry once with the new channel ID
-                    retry_url = f"https://chat.stream-io-api.com/channels/{CHANNEL_TYPE}/{CHANNEL_ID}/message"
-                    retry_resp = requests.post(retry_url, params=post_params, json=payload, timeout=5)
+    try:
+        async with http_session.post(
+            post_url, params=post_params, json=payload, timeout=aiohttp.ClientTimeout(total=5)
+        ) as resp:
+            resp.raise_for_status()
+            data = orjson.loads(await resp.read())
+
+        msg_obj = data.get("message", {})
+        if "id" in msg_obj:
+            remember_bot_message_id(msg_obj["id"])
+
+        log_raw("send", f"SENT BOT MESSAGE: {msg_text}")
+        print("[DEBUG] BOT SENT =>", msg_text)
+    except aiohttp.ClientResponseError as e:
+        # If we get a 401, assume the channel might have changed
+        if e.status == 401:
+            print("[WARN] message_sender_loop => 401 Unauthorized. Refreshing channel ID and retrying once.")
+            try:
+                new_ch, new_wallet = await fetch_channel_info()
+                set_channel_id(new_ch)
+                STREAMER_WALLET_ADDRESS = new_wallet
+
+                # Retry once with the new channel ID
+                retry_url = f"https://chat.stream-io-api.com/channels/{CHANNEL_TYPE}/{CHANNEL_ID}/message"
+                async with http_session.post(
+                    retry_url, params=post_params, json=payload, timeout=aiohttp.ClientTimeout(total=5)
+                ) as retry_resp:
                     retry_resp.raise_for_status()
+                    data2 = orjson.loads(await retry_resp.read())
 
-                    data2 = retry_resp.json()
-                    msg_obj2 = data2.get("message", {})
-                    if "id" in msg_obj2:
-                        bot_sent_message_ids.add(msg_obj2["id"])
+                msg_obj2 = data2.get("message", {})
+                if "id" in msg_obj2:
+                    remember_bot_message_id(msg_obj2["id"])
 
-                    log_raw("send", f"SENT BOT MESSAGE (retry): {msg_text}")
-                    print("[DEBUG] BOT SENT (retry) =>", msg_text)
-                except Exception as ex2:
-                    print("[ERROR] Retry after 401 also failed =>", ex2)
-            else:
-                print("[ERROR] message_sender_loop =>", e)
-        except Exception as e:
+                log_raw("send", f"SENT BOT MESSAGE (retry): {msg_text}")
+                print("[DEBUG] BOT SENT (retry) =>", msg_text)
+            except Exception as ex2:
+                print("[ERROR] Retry after 401 also failed =>", ex2)
+        else:
             print("[ERROR] message_sender_loop =>", e)
+    except Exception as e:
+        print("[ERROR] message_sender_loop =>", e)
+
+async def message_sender_loop():
+    """
+    Consumes messages from the bot's queue and POSTs them to the chat channel.
+    Messages already waiting are taken together (up to MAX_BOT_MESSAGE_BATCH)
+    and posted one after another over the keep-alive session, so chat order
+    always matches queue order; the rate-limit sleep is paid once per batch.
+    """
+    while True:
+        batch = [await message_send_queue.get()]
+        while len(batch) < MAX_BOT_MESSAGE_BATCH and not message_send_queue.empty():
+            batch.append(message_send_queue.get_nowait())
+
+        try:
+            # strictly in order: winners before the summary, level-ups before !rank replies
+            for msg_text in batch:
+                await send_bot_message(msg_text)
         finally:
-            message_send_queue.task_done()
+            for _ in batch:
+                message_send_queue.task_done()
+
+        # keep the same overall pace as one message per BOT_MESSAGE_RATE_LIMIT
+        await asyncio.sleep(BOT_MESSAGE_RATE_LIMIT * len(batch))
 
 async def promotion_poster_loop():
     if not PROMOTIONS_ENABLED or not promotions_list:
         return
 
-    i = 0
-    total = len(promotions_list)
-    while True:
-        queue_bot_message(promotions_list[i])
-        i = (i + 1) % total
+    for promo in itertools.cycle(promotions_list):
+        queue_bot_message(promo)
         await asyncio.sleep(PROMOTION_INTERVAL_SECONDS)
 
 # --------------------------------------------------
-# Final Countdown Coroutine
+# Final Countdowns
 # --------------------------------------------------
-async def final_countdown_coroutine(entry_name: str):
-    g = giveaways_db.get(entry_name)
-    if not g or not g["is_active"]:
-        return
-
-    g["in_final_countdown"] = True
-    save_giveaways()
-
-    for i in range(FINAL_COUNTDOWN_SECONDS, 0, -1):
-        if not g["is_active"]:
-            return
-        queue_bot_message(f"{g['name']} winner(s) picked in {i}..")
-        await asyncio.sleep(1)
-        if not g["is_active"]:
-            return
+async def countdown_ticker():
+    """
+    Announces every running final countdown from one task: it wakes on the
+    next whole-second boundary of the soonest countdown, then ticks all of
+    them, instead of one task + timer per giveaway.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        if not countdowns:
+            countdown_started.clear()
+            await countdown_started.wait()
+
+        now = loop.time()
+        next_tick = 1.0
+        for entry_name, countdown in list(countdowns.items()):
+            # One broken giveaway (e.g. an unreadable prize list) must not
+            # take the ticker, and with it the whole bot, down.
+            try:
+                g = giveaways_db.get(entry_name)
+                if not g or not g["is_active"]:
+                    del countdowns[entry_name]
+                    continue
+                remaining = countdown[0] - now
+                if remaining <= 0:
+                    del countdowns[entry_name]
+                    end_giveaway(entry_name)
+                    continue
+                secs = math.ceil(remaining)
+                if secs != countdown[1]:
+                    queue_bot_message(f"{g['name']} winner(s) picked in {secs}..")
+                    countdown[1] = secs
+                next_tick = min(next_tick, remaining - (secs - 1))
+            except Exception as e:
+                print(f"[ERROR] Countdown for {entry_name} failed: {e}")
+                countdowns.pop(entry_name, None)
 
-    end_giveaway(entry_name)
+        await asyncio.sleep(next_tick)
 
 # --------------------------------------------------
-# Auto-End Checking + Warnings
+# Auto-End Timers + Warnings
 # --------------------------------------------------
-async def autoend_check_loop():
-    warn_times_in_seconds = [m * 60 for m in GIVEAWAY_WARNING_TIMES_MINUTES]
-    while True:
-        now_ts = time.time()
-        to_end = []
-
-        for entry_name, g in list(giveaways_db.items()):
-            if g["is_active"] and g.get("auto_end") is not None:
-                time_left = g["auto_end"] - now_ts
-                if time_left <= 0:
-                    if FINAL_COUNTDOWN_SECONDS <= 0 or g.get("in_final_countdown"):
-                        to_end.append(entry_name)
-                    else:
-                        if not g.get("in_final_countdown"):
-                            asyncio.create_task(final_countdown_coroutine(entry_name))
-                    continue
+def cancel_giveaway_timers(entry_name: str):
+    for timer in giveaway_timers.pop(entry_name, ()):
+        timer.cancel()
+    countdowns.pop(entry_name, None)
 
-                if (
-                    FINAL_COUNTDOWN_SECONDS > 0
-                    and time_left <= FINAL_COUNTDOWN_SECONDS
-                    and not g.get("in_final_countdown", False)
-                ):
-                    asyncio.create_task(final_countdown_coroutine(entry_name))
-                    continue
+def schedule_giveaway_timers(entry_name: str):
+    """
+    Arms loop.call_later timers for a giveaway's warnings, final countdown
+    and end, cancelling any timers armed for it earlier.
+    """
+    cancel_giveaway_timers(entry_name)
 
-                if "warned_for" not in g:
-                    g["warned_for"] = []
+    g = giveaways_db.get(entry_name)
+    if not g or not g["is_active"] or g.get("auto_end") is None:
+        return
+
+    # auto_end stays wall-clock on disk; timing runs on the loop's monotonic clock
+    loop = asyncio.get_running_loop()
+    time_left = g["auto_end"] - time.time()
+    g["_deadline"] = loop.time() + time_left
+    timers = giveaway_timers[entry_name] = []
+    warned_for = g["warned_for"]
+    for w_sec in GIVEAWAY_WARNING_TIMES_SECONDS:
+        # warnings inside the final countdown window are never announced
+        if w_sec not in warned_for and w_sec > FINAL_COUNTDOWN_SECONDS:
+            timers.append(loop.call_later(time_left - w_sec, warn_giveaway_ending, entry_name, w_sec))
+
+    if FINAL_COUNTDOWN_SECONDS > 0 and not g.get("in_final_countdown"):
+        # countdown_ticker() ends the giveaway itself
+        timers.append(loop.call_later(time_left - FINAL_COUNTDOWN_SECONDS, start_final_countdown, entry_name))
+    else:
+        timers.append(loop.call_later(time_left, end_giveaway_if_active, entry_name))
+
+def warn_giveaway_ending(entry_name: str, w_sec: int):
+    g = giveaways_db.get(entry_name)
+    if not g or not g["is_active"] or w_sec in g["warned_for"]:
+        return
+    if FINAL_COUNTDOWN_SECONDS > 0 and g["_deadline"] - asyncio.get_running_loop().time() <= FINAL_COUNTDOWN_SECONDS:
+        return  # already in the final countdown window
+    mins_left = int(w_sec // 60)
+    queue_bot_message(
+        f"{g['name']} ends in {mins_left} minute{'s' if mins_left!=1 else ''}! "
+        f"Type {g['entry_name']} to enter!"
+    )
+    g["warned_for"].add(w_sec)
+    mark_giveaways_dirty()
 
-                for w_sec in sorted(warn_times_in_seconds, reverse=True):
-                    if time_left <= w_sec and w_sec not in g["warned_for"]:
-                        mins_left = int(w_sec // 60)
-                        queue_bot_message(
-                            f"{g['name']} ends in {mins_left} minute{'s' if mins_left!=1 else ''}! "
-                            f"Type {g['entry_name']} to enter!"
-                        )
-                        g["warned_for"].append(w_sec)
-                        save_giveaways()
+def start_final_countdown(entry_name: str):
+    g = giveaways_db.get(entry_name)
+    if not g or not g["is_active"]:
+        return
+    g["in_final_countdown"] = True
+    mark_giveaways_dirty()
 
-        for entry_name in to_end:
-            end_giveaway(entry_name)
+    # The first number goes out now; countdown_ticker() announces the rest
+    deadline = asyncio.get_running_loop().time() + FINAL_COUNTDOWN_SECONDS
+    countdowns[entry_name] = [deadline, FINAL_COUNTDOWN_SECONDS]
+    queue_bot_message(f"{g['name']} winner(s) picked in {FINAL_COUNTDOWN_SECONDS}..")
+    countdown_started.set()
 
-        await asyncio.sleep(2)
+def end_giveaway_if_active(entry_name: str):
+    g = giveaways_db.get(entry_name)
+    if g and g["is_active"]:
+        end_giveaway(entry_name)
 
 async def watch_for_quit():
     await quit_event.wait()
     await message_send_queue.join()
+    await flush_dirty_data()
+    await log_queue.join()
     print("[DEBUG] Exiting gracefully now...")
     sys.exit(0)
 
 # --------------------------------------------------
 # Command Handlers
 # --------------------------------------------------
-def handle_admin_command(admin_wallet: str, text: str):
-    lower = text.lower()
-
-    if lower.startswith("!addadmin"):
-        parts = parse_command_args(text)
-        if len(parts) >= 2:
-            newadm = parts[1].lower()
-            admins_set.add(newadm)
-            save_admins()
-            queue_bot_message(f"Added admin {newadm}.")
-        else:
-            queue_bot_message("Usage: !addadmin @someone")
-
-    elif lower.startswith("!removeadmin"):
-        parts = parse_command_args(text)
-        if len(parts) >= 2:
-            oldadm = parts[1].lower()
-            if oldadm in admins_set:
-                admins_set.remove(oldadm)
-                save_admins()
-                queue_bot_message(f"Removed admin {oldadm}.")
-            else:
-                queue_bot_message(f"{oldadm} is not an admin.")
+def _handle_addadmin(admin_wallet: str, text: str, parts: list):
+    if len(parts) >= 2:
+        newadm = parts[1].lower()
+        admins_set.add(newadm)
+        mark_admins_dirty()
+        queue_bot_message(f"Added admin {newadm}.")
+    else:
+        queue_bot_message("Usage: !addadmin @someone")
+
+def _handle_removeadmin(admin_wallet: str, text: str, parts: list):
+    if len(parts) >= 2:
+        oldadm = parts[1].lower()
+        if oldadm in admins_set:
+            admins_set.remove(oldadm)
+            mark_admins_dirty()
+            queue_bot_message(f"Removed admin {oldadm}.")
         else:
-            queue_bot_message("Usage: !removeadmin @someone")
+            queue_bot_message(f"{oldadm} is not an admin.")
+    else:
+        queue_bot_message("Usage: !removeadmin @someone")
 
-    elif lower.startswith("!blacklist") or lower.startswith("!kill"):
-        parts = parse_command_args(text)
-        if len(parts) < 2:
-            queue_bot_message("Usage: !blacklist @someone OR !blacklist 0xWallet")
-            return
-        target = parts[1].lower()
-        blacklist_set.add(target)
-        save_blacklist()
-        queue_bot_message(f"'{target}' has been added to the blacklist and will be ignored.")
-
-    elif lower.startswith("!createprizelist"):
-        create_prizelist(admin_wallet, text)
-
-    elif lower.startswith("!creategiveaway"):
-        splitted = text.split("!creategiveaway", 1)
-        if len(splitted) < 2:
-            queue_bot_message("Usage: !creategiveaway, name, !entry, minutes, whitelist, prizelist, winners, minlvl")
-            return
-        raw_args = splitted[1].strip(" ,")
-        create_new_giveaway(admin_wallet, raw_args)
+def _handle_blacklist(admin_wallet: str, text: str, parts: list):
+    if len(parts) < 2:
+        queue_bot_message("Usage: !blacklist @someone OR !blacklist 0xWallet")
+        return
+    target = parts[1].lower()
+    blacklist_set.add(target)
+    mark_blacklist_dirty()
+    queue_bot_message(f"'{target}' has been added to the blacklist and will be ignored.")
 
-    elif lower.startswith("!endgiveaway"):
-        parts = parse_command_args(text)
-        if len(parts) < 2:
-            queue_bot_message("Usage: !endgiveaway !entry [seconds]")
-            return
-        if len(parts) == 2:
-            # No seconds specified => end now
+def _handle_creategiveaway(admin_wallet: str, text: str, parts: list):
+    splitted = text.split("!creategiveaway", 1)
+    if len(splitted) < 2:
+        queue_bot_message("Usage: !creategiveaway, name, !entry, minutes, whitelist, prizelist, winners, minlvl")
+        return
+    raw_args = splitted[1].strip(" ,")
+    create_new_giveaway(admin_wallet, raw_args)
+
+def _handle_endgiveaway(admin_wallet: str, text: str, parts: list):
+    if len(parts) < 2:
+        queue_bot_message("Usage: !endgiveaway !entry [seconds]")
+        return
+    if len(parts) == 2:
+        # No seconds specified => end now
+        end_giveaway(parts[1])
+    else:
+        # Attempt to parse the number of seconds
+        try:
+            seconds = int(parts[2])
+            set_giveaway_end_in(parts[1], seconds)
+        except ValueError:
+            # Fallback => end now
             end_giveaway(parts[1])
-        else:
-            # Attempt to parse the number of seconds
-            try:
-                seconds = int(parts[2])
-                set_giveaway_end_in(parts[1], seconds)
-            except ValueError:
-                # Fallback => end now
-                end_giveaway(parts[1])
-
-    elif lower.startswith("!cancelgiveaway"):
-        parts = parse_command_args(text)
-        if len(parts) >= 2:
-            cancel_giveaway(parts[1])
-        else:
-            queue_bot_message("Usage: !cancelgiveaway !entry")
-
-    elif lower.startswith("!quit") or lower.startswith("!exit") or lower.startswith("!shutdown"):
-        queue_bot_message("The Oekaki.io XP / Prize bot is shutting down...")
-        save_admins()
-        save_users()
-        save_donations()
-        save_giveaways()
-        quit_event.set()
-
-def handle_user_command(user_obj: dict, text: str):
-    t = text.strip().lower()
-    if t.startswith("!rank") or t.startswith("!level"):
-        wallet = user_obj["wallet"]
-        xp_total = user_obj["xp"]
-        lvl = user_obj["level"]
-        name = user_obj["name"] or user_obj["wallet"]
-        rank = get_user_rank(wallet)
-        xp_needed_for_this_level = xp_for_next_level(lvl)
-        xp_to_reach_this_level = total_xp_to_reach_level(lvl)
-        xp_in_level = xp_total - xp_to_reach_this_level
 
-        queue_bot_message(
-            f"{name}: Rank #{rank}, Level {lvl}, XP: {xp_in_level}/{xp_needed_for_this_level}"
-        )
+def _handle_cancelgiveaway(admin_wallet: str, text: str, parts: list):
+    if len(parts) >= 2:
+        cancel_giveaway(parts[1])
+    else:
+        queue_bot_message("Usage: !cancelgiveaway !entry")
+
+def _handle_quit(admin_wallet: str, text: str, parts: list):
+    queue_bot_message("The Oekaki.io XP / Prize bot is shutting down...")
+    mark_admins_dirty()
+    mark_users_dirty()
+    mark_donations_dirty()
+    mark_giveaways_dirty()
+    quit_event.set()
+
+def _handle_rank(user_obj: dict, text: str, parts: list):
+    wallet = user_obj["wallet"]
+    xp_total = user_obj["xp"]
+    lvl = user_obj["level"]
+    name = user_obj["name"] or user_obj["wallet"]
+    rank = get_user_rank(wallet)
+    xp_needed_for_this_level = xp_for_next_level(lvl)
+    xp_to_reach_this_level = total_xp_to_reach_level(lvl)
+    xp_in_level = xp_total - xp_to_reach_this_level
 
-    elif t.startswith("!timeleft"):
-        parts = parse_command_args(text)
-        if len(parts) >= 2:
-            timeleft_giveaway(parts[1])
-        else:
-            queue_bot_message("Usage: !timeleft !entrycmd")
+    queue_bot_message(
+        f"{name}: Rank #{rank}, Level {lvl}, XP: {xp_in_level}/{xp_needed_for_this_level}"
+    )
 
-    elif t.startswith("!winners"):
-        parts = parse_command_args(text)
-        if len(parts) >= 2:
-            winners_giveaway(parts[1])
-        else:
-            queue_bot_message("Usage: !winners !entrycmd")
-
-    elif t.startswith("!"):
-        # Possibly a giveaway entry
-        entryname = t.split()[0]
-        if entryname in giveaways_db:
-            user_enter_giveaway(user_obj["wallet"], user_obj["name"], entryname)
-            
-    elif t.startswith("!winners"):
-        parts = parse_command_args(text)
-        # We expect the user to do: "!winners !mygiveaway" so parts would be ["!winners", "!mygiveaway"]
-        if len(parts) >= 2:
-            winners_giveaway(parts[1])  # pass the entry command, e.g. "!mygiveaway"
-        else:
-            queue_bot_message("Usage: !winners !giveawaycommand")            
+def _handle_timeleft(user_obj: dict, text: str, parts: list):
+    if len(parts) >= 2:
+        timeleft_giveaway(parts[1])
+    else:
+        queue_bot_message("Usage: !timeleft !entrycmd")
+
+def _handle_winners(user_obj: dict, text: str, parts: list):
+    # We expect the user to do: "!winners !mygiveaway" so parts would be ["!winners", "!mygiveaway"]
+    if len(parts) >= 2:
+        winners_giveaway(parts[1])  # pass the entry command, e.g. "!mygiveaway"
+    else:
+        queue_bot_message("Usage: !winners !entrycmd")
+
+# The command word at the start of a message, e.g. "!creategiveaway" in "!creategiveaway, ..."
+_COMMAND_RE = re.compile(r"!\w+")
+
+def handle_admin_command(admin_wallet: str, text: str, parts: list):
+    m = _COMMAND_RE.match(text)
+    if not m:
+        return
+    handler = ADMIN_COMMANDS.get(m.group(0).lower())
+    if handler:
+        handler(admin_wallet, text, parts)
+
+def handle_user_command(user_obj: dict, text: str, parts: list):
+    m = _COMMAND_RE.match(text)
+    handler = USER_COMMANDS.get(m.group(0).lower()) if m else None
+    if handler:
+        handler(user_obj, text, parts)
+        return
+
+    # Possibly a giveaway entry (entry commands need not be "!" + word characters)
+    entryname = parts[0].lower()
+    if entryname in giveaways_db:
+        user_enter_giveaway(user_obj["wallet"], user_obj["name"], entryname)
 
-def create_prizelist(admin_user: str, text: str):
+def create_prizelist(admin_user: str, text: str, parts: list):
     splitted = text.split("!createprizelist", 1)
     if len(splitted) < 2:
         queue_bot_message("Usage: !createprizelist listName, item1, item2, ...")
         return
 
     raw_args = splitted[1].strip(" ,")
-    parts = [p.strip() for p in raw_args.split(",")]
-    if not parts:
+    args = [p.strip() for p in raw_args.split(",")]
+    if not args:
         queue_bot_message("Usage: !createprizelist listName, item1, item2, ...")
         return
 
-    list_name = parts[0]
-    prizes = parts[1:]
+    list_name = args[0]
+    prizes = args[1:]
 
     if not list_name:
         queue_bot_message("No prizelist name found. Usage: !createprizelist listName, item1, item2, ...")
@@ -1220,41 +1603,146 @@ def create_prizelist(admin_user: str, text: str):
     else:
         queue_bot_message(f"Creating new prizelist '{list_name}' with {len(cleaned_prizes)} prize(s).")
 
-    with plist_path.open("w", encoding="utf-8") as f:
-        if cleaned_prizes:
-            f.write("\n".join(cleaned_prizes))
+    # The file is written off the event loop; "x" mode refuses to clobber a
+    # list that appeared since the is_file() check above.
+    fut = asyncio.get_running_loop().run_in_executor(
+        None, _write_prizelist_file, plist_path, cleaned_prizes
+    )
+    fut.add_done_callback(functools.partial(_prizelist_written, list_name))
+
+def _write_prizelist_file(plist_path: Path, prizes: list):
+    with plist_path.open("x", encoding="utf-8") as f:
+        if prizes:
+            f.write("\n".join(prizes))
             f.write("\n")
 
+def _prizelist_written(list_name: str, fut):
+    exc = fut.exception()
+    if isinstance(exc, FileExistsError):
+        queue_bot_message(f"Prizelist '{list_name}' already exists! Can't overwrite.")
+    elif exc is not None:
+        print(f"[ERROR] Could not write prizelist '{list_name}' => {exc}")
+
+# Command word => handler, looked up once per message instead of an if/elif chain
+ADMIN_COMMANDS = {
+    "!addadmin": _handle_addadmin,
+    "!removeadmin": _handle_removeadmin,
+    "!blacklist": _handle_blacklist,
+    "!kill": _handle_blacklist,
+    "!createprizelist": create_prizelist,
+    "!creategiveaway": _handle_creategiveaway,
+    "!endgiveaway": _handle_endgiveaway,
+    "!cancelgiveaway": _handle_cancelgiveaway,
+    "!quit": _handle_quit,
+    "!exit": _handle_quit,
+    "!shutdown": _handle_quit,
+}
+
+USER_COMMANDS = {
+    "!rank": _handle_rank,
+    "!level": _handle_rank,
+    "!timeleft": _handle_timeleft,
+    "!winners": _handle_winners,
+}
+
 # --------------------------------------------------
 # Main Bot Entry
 # --------------------------------------------------
 
+def _orjson_dumps_str(obj) -> str:
+    return orjson.dumps(obj).decode("utf-8")
+
 async def main_loop():
-    tasks = []
+    global http_session
+
+    # Python 3.12+: new tasks run eagerly up to their first real suspension,
+    # so short ones (e.g. queueing a donation sound) finish without a loop round-trip.
+    eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_task_factory is not None:
+        asyncio.get_running_loop().set_task_factory(eager_task_factory)
+
+    # Small keep-alive pool: messages are posted one at a time, so a few
+    # connections per host are plenty, and idle ones are kept for the next burst.
+    connector = aiohttp.TCPConnector(
+        limit=8,
+        limit_per_host=4,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+    )
+    # Request bodies (json=...) are encoded with orjson instead of stdlib json
+    http_session = aiohttp.ClientSession(connector=connector, json_serialize=_orjson_dumps_str)
+    try:
+        await run_bot()
+    finally:
+        await http_session.close()
+
+async def run_bot():
+    global STREAMER_WALLET_ADDRESS
+
+    # Fetch the current channel ID + streamer wallet while the data files
+    # load in a worker thread; neither depends on the other.
+    loop = asyncio.get_running_loop()
+    (channel_id, STREAMER_WALLET_ADDRESS), _ = await asyncio.gather(
+        fetch_channel_info(),
+        loop.run_in_executor(None, init_data),
+    )
+    set_channel_id(channel_id)
+
+    # Back on the loop: anything touching asyncio objects happens here
+    queue_bot_message("The Oekaki.io XP / Prize bot is starting up!")
+    for entry_name in giveaways_db:
+        schedule_giveaway_timers(entry_name)
+    print("[DEBUG] Starting Bot.  RateLimit=", BOT_MESSAGE_RATE_LIMIT)
+
+    sender_task = asyncio.create_task(message_sender_loop())
+    log_task = asyncio.create_task(log_writer_loop())
+    tasks = [sender_task, log_task]
     tasks.append(asyncio.create_task(connect_and_watch_loop()))
-    tasks.append(asyncio.create_task(message_sender_loop()))
-    tasks.append(asyncio.create_task(autoend_check_loop()))
     tasks.append(asyncio.create_task(promotion_poster_loop()))
     tasks.append(asyncio.create_task(watch_for_quit()))
     tasks.append(asyncio.create_task(audio_player_loop()))
-    
-
-    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
-    for t in pending:
-        t.cancel()
-
-def main():
-    global CHANNEL_ID, STREAMER_WALLET_ADDRESS
+    tasks.append(asyncio.create_task(persistence_flusher()))
+    tasks.append(asyncio.create_task(countdown_ticker()))
 
-    # 1) Dynamically fetch the current channel ID + streamer wallet
-    CHANNEL_ID, STREAMER_WALLET_ADDRESS = fetch_channel_info()
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for t in done:
+            exc = None if t.cancelled() else t.exception()
+            if exc is not None:
+                print(f"[ERROR] Background task {t.get_coro().__qualname__} crashed:")
+                traceback.print_exception(type(exc), exc, exc.__traceback__)
+    finally:
+        # Stop everything but the senders, then give queued messages, data
+        # files and log lines a bounded chance to get out before exiting.
+        for t in tasks:
+            if t is not sender_task and t is not log_task:
+                t.cancel()
+        await drain_before_exit(sender_task, log_task)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def drain_before_exit(sender_task, log_task):
+    async def drain():
+        if not sender_task.done():
+            await message_send_queue.join()
+        await flush_dirty_data()
+        if not log_task.done():
+            await log_queue.join()
 
-    # 2) Load all data / start up
-    init_data()
-    print("[DEBUG] Starting Bot.  RateLimit=", BOT_MESSAGE_RATE_LIMIT)
+    try:
+        await asyncio.wait_for(drain(), SHUTDOWN_DRAIN_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"[WARN] Gave up draining queues after {SHUTDOWN_DRAIN_SECONDS} second(s).")
+    except Exception as e:
+        print(f"[ERROR] Could not drain queues before exiting: {e}")
 
-    # 3) Run the main async loop
-    asyncio.run(main_loop())
+def main():
+    # Fetch channel info, load data and run every background task
+    if uvloop is not None:
+        uvloop.run(main_loop())
+    else:
+        asyncio.run(main_loop())
 
 if __name__ == "__main__":
     main()